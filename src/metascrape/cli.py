@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from metascrape.items import SanitizeBudget
+from metascrape.routes import RouteTree
 from metascrape.spiders import EC2Spider
 from metascrape.utils import LoggingFormatter
 
@@ -21,8 +23,17 @@ def main():
         help="The host where the instance metadata service lives.")
     parser.add_argument('-o', '--output', default="metadata.json",
         help="The output file to store scraped information in.")
+    parser.add_argument('-l', '--layout', default=RouteTree.LAYOUT_FLAT, choices=RouteTree.LAYOUTS,
+        help="The output layout, either a flat map of paths or a nested tree of path segments.")
     parser.add_argument('-p', '--port', default=80, type=int,
         help="The port where the instance metadata service is listening.")
+    parser.add_argument('--sanitize-fallback', default=SanitizeBudget.FALLBACK_REDACT,
+        choices=SanitizeBudget.FALLBACKS,
+        help="Whether to redact or skip routes which exceed the sanitize budget.")
+    parser.add_argument('--sanitize-max-size', default=SanitizeBudget.DEFAULT_MAX_SIZE, type=int,
+        help="The maximum size in characters of a route which will be sanitized, or 0 for no limit.")
+    parser.add_argument('--sanitize-max-time', default=SanitizeBudget.DEFAULT_MAX_TIME, type=float,
+        help="The maximum time in seconds to spend sanitizing a single route, or 0 for no limit.")
     parser.add_argument('-v', action='count', dest='verbosity', default=0,
         help="Set logging verbosity. Pass multiple times to increase verbosity.")
 
@@ -34,7 +45,8 @@ def main():
     logger = logging.getLogger("metascrape")
     logger.info("Starting scraper...")
 
-    scrape(args.host, args.port, args.output)
+    scrape(args.host, args.port, args.output, SanitizeBudget(max_size=args.sanitize_max_size,
+        max_time=args.sanitize_max_time, fallback=args.sanitize_fallback), args.layout)
 
 
 def setup_logging(verbosity):
@@ -52,8 +64,11 @@ def setup_logging(verbosity):
     logging.getLogger('metascrape').setLevel(max(logging.WARNING - (verbosity * 10), 0))
 
 
-def scrape(host, port, output_file):
+def scrape(host, port, output_file, sanitize_budget=None, output_layout=RouteTree.LAYOUT_FLAT):
     """Execute the scraper on the given host and port."""
+    if sanitize_budget is None:
+        sanitize_budget = SanitizeBudget()
+
     process = CrawlerProcess({
         'BOT_NAME': 'metascrape',
         'CONCURRENT_REQUESTS_PER_DOMAIN': 10,
@@ -61,7 +76,11 @@ def scrape(host, port, output_file):
             'metascrape.pipelines.JSONItemPipeline': 1000
         },
         'JSON_OUTPUT_FILE': output_file,
+        'JSON_OUTPUT_LAYOUT': output_layout,
         'LOG_ENABLED': False,
+        'SANITIZE_FALLBACK': sanitize_budget.fallback,
+        'SANITIZE_MAX_SIZE': sanitize_budget.max_size,
+        'SANITIZE_MAX_TIME': sanitize_budget.max_time,
     })
 
     process.crawl(EC2Spider, metadata_host=host, metadata_port=port)
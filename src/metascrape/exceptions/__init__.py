@@ -8,3 +8,21 @@ class WrongServiceException(Exception):
 
     If, say, the EC2 crawler attempts to crawl the GCP metadata service, this exception will be raised.
     """
+
+
+class SanitizeBudgetExceededException(Exception):
+    """
+    An exception thrown when sanitizing a route exceeds its size or time budget.
+
+    Route bodies such as `user-data` are untrusted, so the pipeline bounds the cost of running the matchers over them
+    and falls back to redacting or skipping the route when this exception is raised.
+    """
+
+
+class RouteConflictException(Exception):
+    """
+    An exception thrown when a route cannot be stored in the route tree under its own path.
+
+    This happens when a route's path is not in canonical form, such as one containing `//`, or when a route has already
+    been stored at the same node, such as `/latest` and `/latest/`.
+    """
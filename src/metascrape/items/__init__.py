@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from metascrape.exceptions import SanitizeBudgetExceededException
+
 from ipaddress import IPv4Address
 
 import json
 import re
 import scrapy
 import string
+import time
 
 
 class Matchers(object):
@@ -22,6 +25,58 @@ class Matchers(object):
     MAC_ADDRESS = re.compile(r'\b(?P<mac_address>[0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2})\b')
 
 
+class SanitizeBudget(object):
+    """
+    A per-route budget bounding the cost of sanitizing untrusted route bodies.
+
+    Python regular expressions cannot be interrupted mid-match, so the time limit is only checked between passes. Every
+    pattern in `Matchers` runs in linear time, so the default size limit is derived from `WORST_CASE_THROUGHPUT`, a
+    measured worst case in characters per second over the adversarial benchmark corpus with a safety margin of roughly
+    2.5x, to finish every pass within the default time limit on typical hardware. This is not a guarantee, as
+    throughput depends on the host. A limit of zero disables that limit.
+    """
+
+    FALLBACK_REDACT = "redact"
+
+    FALLBACK_SKIP = "skip"
+
+    FALLBACKS = (FALLBACK_REDACT, FALLBACK_SKIP)
+
+    WORST_CASE_THROUGHPUT = 256 * 1024
+
+    DEFAULT_MAX_TIME = 1.0
+
+    DEFAULT_MAX_SIZE = int(WORST_CASE_THROUGHPUT * DEFAULT_MAX_TIME)
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, max_time=DEFAULT_MAX_TIME, fallback=FALLBACK_REDACT):
+        """
+        Construct a new budget with the given size in characters, time in seconds, and fallback behavior.
+
+        Passing zero for either limit disables it.
+        """
+        if fallback not in SanitizeBudget.FALLBACKS:
+            raise ValueError("Unknown sanitize fallback: {}".format(fallback))
+
+        self.max_size, self.max_time, self.fallback = max_size, max_time, fallback
+
+    def check_size(self, route):
+        """Raise if the given route is too large to sanitize within this budget."""
+        size = len(route["path"]) + len(route["response"])
+
+        if self.max_size > 0 and size > self.max_size:
+            raise SanitizeBudgetExceededException("Route {} is {} characters, exceeding the budget of {}".format(
+                route["path"], size, self.max_size))
+
+    def check_time(self, route, started):
+        """Raise if sanitizing the given route, started at the given monotonic time, has run out of time."""
+        elapsed = time.monotonic() - started
+
+        if self.max_time > 0 and elapsed > self.max_time:
+            raise SanitizeBudgetExceededException(
+                "Route {} took {:.3f}s to sanitize, exceeding the budget of {:.3f}s".format(route["path"], elapsed,
+                    self.max_time))
+
+
 class Route(scrapy.Item):
     """An item representing an available route for the service."""
 
@@ -41,19 +96,38 @@ class Route(scrapy.Item):
     def path_postfix(self):
         """Return the path postfix without the API version prepended."""
         path = self["path"]
-        path_components = list(filter(lambda pc: len(pc) > 0, path.split("/")))
+        postfix = path.lstrip("/").partition("/")[2].lstrip("/")
+
+        return postfix if postfix or not path.endswith("/") else "/"
+
+    def sanitize(self, budget=None):
+        """
+        Sanitize this route's data to redact private information.
+
+        If a budget is given, raise `SanitizeBudgetExceededException` when the route is too large or takes too long to
+        sanitize. The route may be partially sanitized when this happens, so callers should redact or discard it.
+        """
+        started = time.monotonic()
+
+        if budget is not None:
+            budget.check_size(self)
+
+        for sanitizer in [self._sanitize_ip_addresses, self._sanitize_mac_addresses, self._sanitize_account_ids,
+                self._sanitize_host_name, self._sanitize_aws_identifiers, self._sanitize_iam_credentials,
+                self._sanitize_instance_identity]:
+            sanitizer()
+
+            if budget is not None:
+                budget.check_time(self, started)
 
-        return "{}{}".format("/".join(path_components[1:]), "/" if path.endswith("/") else "")
+    def redact(self):
+        """Redact this route's entire response, sanitizing only its path."""
+        self["response"] = ""
 
-    def sanitize(self):
-        """Sanitize this route's data to redact private information."""
         self._sanitize_ip_addresses()
         self._sanitize_mac_addresses()
         self._sanitize_account_ids()
-        self._sanitize_host_name()
         self._sanitize_aws_identifiers()
-        self._sanitize_iam_credentials()
-        self._sanitize_instance_identity()
 
     def _sanitize_ip_addresses(self):
         """Sanitize public and private IP addresses in this route."""
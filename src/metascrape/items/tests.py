@@ -1,11 +1,86 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from metascrape.items import Matchers, Route
+from metascrape.exceptions import SanitizeBudgetExceededException
+from metascrape.items import Matchers, Route, SanitizeBudget
 
+import os
+import re
+import time
 import unittest
 
 
+class AdversarialCorpus(object):
+    """Generators for untrusted bodies crafted to make the matchers do as much work as possible."""
+
+    @staticmethod
+    def repeat(unit, size):
+        """Repeat the given unit until it is exactly the given size."""
+        return (unit * (size // len(unit) + 1))[:size]
+
+    @staticmethod
+    def digit_run(size):
+        """One long run of digits, straddling account ID and IPv4 octet lengths everywhere."""
+        return "1" * size
+
+    @staticmethod
+    def near_miss_identifiers(size):
+        """AWS identifiers one hex digit too short to match."""
+        return AdversarialCorpus.repeat("i-0123456 ", size)
+
+    @staticmethod
+    def long_identifier(size):
+        """A single AWS identifier whose hex id runs far past the maximum length."""
+        return "i-" + "a" * (size - 2)
+
+    @staticmethod
+    def near_miss_hostnames(size):
+        """EC2 host names which only fail to match on the root domain."""
+        return AdversarialCorpus.repeat("ip-10-0-0-1.us-west-2.compute.amazonaws.co ", size)
+
+    @staticmethod
+    def unterminated_region(size):
+        """An EC2 host name prefix whose region never ends."""
+        return "ip-10-0-0-1." + "a" * (size - 12)
+
+    @staticmethod
+    def dotted_octets(size):
+        """One long run of dotted octets, overlapping IPv4 addresses everywhere."""
+        return AdversarialCorpus.repeat("1.2.3.", size)
+
+    @staticmethod
+    def mac_prefixes(size):
+        """MAC addresses missing their final octet."""
+        return AdversarialCorpus.repeat("ab:cd:ef:01:23:", size)
+
+    @staticmethod
+    def dense_account_ids(size):
+        """AWS account IDs back to back, each of which must be replaced."""
+        return AdversarialCorpus.repeat("012345678901 ", size)
+
+    @staticmethod
+    def dense_identifiers(size):
+        """AWS identifiers back to back, each of which must be replaced."""
+        return AdversarialCorpus.repeat("i-0123456789abcdef0 ", size)
+
+    @staticmethod
+    def dense_ipv4_addresses(size):
+        """Public IPv4 addresses back to back, each of which must be parsed and replaced."""
+        return AdversarialCorpus.repeat("8.8.8.8 ", size)
+
+    @staticmethod
+    def dense_mac_addresses(size):
+        """MAC addresses back to back, each of which must be replaced."""
+        return AdversarialCorpus.repeat("0a:1b:2c:3d:4e:5f ", size)
+
+    @classmethod
+    def all(cls):
+        """Return all corpus generators."""
+        return [cls.digit_run, cls.near_miss_identifiers, cls.long_identifier, cls.near_miss_hostnames,
+            cls.unterminated_region, cls.dotted_octets, cls.mac_prefixes, cls.dense_account_ids,
+            cls.dense_identifiers, cls.dense_ipv4_addresses, cls.dense_mac_addresses]
+
+
 class MatcherTestCase(unittest.TestCase):
     """Regular expression test case for EC2 route objects."""
 
@@ -70,6 +145,105 @@ class MatcherTestCase(unittest.TestCase):
             self.assertIsNone(Matchers.MAC_ADDRESS.search(mac))
 
 
+class MatcherLinearityTestCase(unittest.TestCase):
+    """Test case proving that the matchers stay linear over the adversarial corpus."""
+
+    MATCHERS = sorted(name for name, value in vars(Matchers).items() if isinstance(value, re.Pattern))
+
+    SMALL, LARGE = 32 * 1024, 256 * 1024
+
+    def time_sub(self, pattern, body):
+        """Return the best time of a few substitutions of the given pattern over the given body."""
+        timings = []
+
+        for _ in range(3):
+            started = time.perf_counter()
+            pattern.sub("x", body)
+            timings.append(time.perf_counter() - started)
+
+        return min(timings)
+
+    def test_linear_worst_case(self):
+        """Test that an 8x larger adversarial body costs well under the 64x of a quadratic pattern."""
+        for generator in AdversarialCorpus.all():
+            small, large = generator(self.SMALL), generator(self.LARGE)
+
+            for name in self.MATCHERS:
+                pattern = getattr(Matchers, name)
+                ratio = self.time_sub(pattern, large) / max(self.time_sub(pattern, small), 1e-6)
+
+                self.assertLess(ratio, 24, "{} is superlinear on {}".format(name, generator.__name__))
+
+
+@unittest.skipUnless(os.environ.get("METASCRAPE_BENCHMARK"), "set METASCRAPE_BENCHMARK=1 to run benchmarks")
+class SanitizeBenchmarkTestCase(unittest.TestCase):
+    """Wall-clock benchmarks of sanitizing adversarial bodies."""
+
+    def test_multi_megabyte_body(self):
+        """Test that an unbounded budget sanitizes a multi-megabyte body in reasonable time."""
+        for generator in AdversarialCorpus.all():
+            route = Route(path="/latest/user-data", response=generator(4 * 1024 * 1024))
+
+            started = time.monotonic()
+            route.sanitize(SanitizeBudget(max_size=0, max_time=0))
+
+            self.assertLess(time.monotonic() - started, 10, generator.__name__)
+
+    def test_worst_case_throughput(self):
+        """Test that every pass over a body of the default maximum size fits in the default time limit."""
+        path = "/latest/user-data"
+
+        for generator in AdversarialCorpus.all():
+            route = Route(path=path, response=generator(SanitizeBudget.DEFAULT_MAX_SIZE - len(path)))
+
+            started = time.monotonic()
+            route.sanitize(SanitizeBudget(max_size=0, max_time=0))
+
+            self.assertLess(time.monotonic() - started, SanitizeBudget.DEFAULT_MAX_TIME, generator.__name__)
+
+
+class SanitizeBudgetTestCase(unittest.TestCase):
+    """Tests cases against the sanitize budget."""
+
+    def test_fallback(self):
+        """Tests that only known fallbacks are accepted."""
+        for fallback in SanitizeBudget.FALLBACKS:
+            self.assertEqual(fallback, SanitizeBudget(fallback=fallback).fallback)
+
+        with self.assertRaises(ValueError):
+            SanitizeBudget(fallback="ignore")
+
+    def test_size(self):
+        """Tests that oversized routes exceed the budget before any pattern runs."""
+        route = Route(path="/latest/user-data", response=AdversarialCorpus.digit_run(2 * 1024 * 1024))
+
+        with self.assertRaises(SanitizeBudgetExceededException):
+            route.sanitize(SanitizeBudget())
+
+        self.assertEqual(AdversarialCorpus.digit_run(2 * 1024 * 1024), route["response"])
+
+    def test_time(self):
+        """Tests that slow routes exceed the budget."""
+        route = Route(path="/latest/user-data", response=AdversarialCorpus.near_miss_hostnames(64 * 1024))
+
+        with self.assertRaises(SanitizeBudgetExceededException):
+            route.sanitize(SanitizeBudget(max_time=1e-9))
+
+    def test_unlimited(self):
+        """Tests that zero disables each limit."""
+        route = Route(path="/latest/user-data", response=AdversarialCorpus.near_miss_hostnames(64 * 1024))
+        route.sanitize(SanitizeBudget(max_size=0, max_time=0))
+
+        self.assertEqual(AdversarialCorpus.near_miss_hostnames(64 * 1024), route["response"])
+
+    def test_within_budget(self):
+        """Tests that small routes are sanitized as usual."""
+        route = Route(path="/latest/meta-data/local-ipv4", response="172.31.0.12")
+        route.sanitize(SanitizeBudget())
+
+        self.assertEqual("10.0.0.1", route["response"])
+
+
 class RouteTestCase(unittest.TestCase):
     """Tests cases against the Route item."""
 
@@ -77,3 +251,12 @@ class RouteTestCase(unittest.TestCase):
         """Tests getting the path postfix from a route."""
         self.assertEqual("meta-data/local-hostname", Route(path="/latest/meta-data/local-hostname").path_postfix)
         self.assertEqual("meta-data/public-keys/", Route(path="/latest/meta-data/public-keys/").path_postfix)
+
+    def test_redact(self):
+        """Tests redacting a route's response while sanitizing its path."""
+        route = Route(path="/latest/meta-data/network/interfaces/macs/0a:1b:2c:3d:4e:5f/vpc-id",
+            response="vpc-0123456789abcdef0")
+        route.redact()
+
+        self.assertEqual("/latest/meta-data/network/interfaces/macs/01:23:45:67:89:ab/vpc-id", route["path"])
+        self.assertEqual("", route["response"])
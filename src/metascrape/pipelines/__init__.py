@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 from metascrape import items
+from metascrape.exceptions import RouteConflictException, SanitizeBudgetExceededException
+from metascrape.routes import RouteTree
 
-import json
 import logging
 
 
@@ -13,13 +14,26 @@ class JSONItemPipeline(object):
     @classmethod
     def from_crawler(cls, crawler):
         """Construct a new pipeline from the given crawler."""
-        return cls(output_file=crawler.settings.get("JSON_OUTPUT_FILE"))
+        settings = crawler.settings
 
-    def __init__(self, output_file):
+        sanitize_budget = items.SanitizeBudget(
+            max_size=settings.getint("SANITIZE_MAX_SIZE", items.SanitizeBudget.DEFAULT_MAX_SIZE),
+            max_time=settings.getfloat("SANITIZE_MAX_TIME", items.SanitizeBudget.DEFAULT_MAX_TIME),
+            fallback=settings.get("SANITIZE_FALLBACK", items.SanitizeBudget.FALLBACK_REDACT),
+        )
+
+        return cls(output_file=settings.get("JSON_OUTPUT_FILE"),
+            output_layout=settings.get("JSON_OUTPUT_LAYOUT", RouteTree.LAYOUT_FLAT), sanitize_budget=sanitize_budget)
+
+    def __init__(self, output_file, output_layout=RouteTree.LAYOUT_FLAT, sanitize_budget=None):
         """Construct a new JSON item pipeline."""
-        self.result = { "routes": {} }
+        if output_layout not in RouteTree.LAYOUTS:
+            raise ValueError("Unknown output layout: {}".format(output_layout))
+
+        self.routes = RouteTree()
         self.logger = logging.getLogger("metascrape.pipelines.{}".format(self.__class__.__name__))
-        self.output_file = output_file
+        self.output_file, self.output_layout = output_file, output_layout
+        self.sanitize_budget = sanitize_budget if sanitize_budget is not None else items.SanitizeBudget()
 
     def open_spider(self, spider):
         """Callback method called when a spider has been opened."""
@@ -30,24 +44,41 @@ class JSONItemPipeline(object):
         self.logger.debug("Received an item from the %s spider: %s", spider, item)
 
         if isinstance(item, items.Route):
-            # sanitize the item
-            item.sanitize()
+            # sanitize the item, falling back if it exceeds its budget
+            try:
+                item.sanitize(self.sanitize_budget)
+            except SanitizeBudgetExceededException as e:
+                if self.sanitize_budget.fallback == items.SanitizeBudget.FALLBACK_SKIP:
+                    self.logger.warning("Skipping route: %s", e)
+                    return
+
+                self.logger.warning("Redacting route: %s", e)
+                item.redact()
 
             # extract values
             path, headers, response, response_encoding = item["path"], item["headers"], item["response"], \
                 item["response_encoding"]
 
-            # insert into output
-            self.result.get('routes')[path] = {
-                'path': path,
-                'headers': headers,
-                'response': response,
-                'response_encoding': response_encoding,
-            }
+            # insert into the route tree
+            try:
+                self.routes.insert(path, headers, response, response_encoding)
+            except RouteConflictException as e:
+                self.logger.warning("Dropping route: %s", e)
+
+    @property
+    def result(self):
+        """Return the output document for all routes received so far."""
+        return { "routes": self.routes.serialize(self.output_layout) }
 
     def close_spider(self, spider):
         """Callback method called when a spider is closed."""
         self.logger.debug("Spider %s has been closed.", spider)
 
+        # stream the route tree rather than serializing it in memory alongside the tree
         with open(self.output_file, 'w') as f:
-            f.write(json.dumps(self.result, sort_keys=True, indent=2))
+            f.write('{\n  "routes": ')
+
+            for chunk in self.routes.iterencode(self.output_layout, indent=2, level=1):
+                f.write(chunk)
+
+            f.write('\n}')
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from metascrape.items import Route, SanitizeBudget
+from metascrape.pipelines import JSONItemPipeline
+
+from scrapy.settings import Settings
+
+import json
+import mock
+import os
+import tempfile
+import unittest
+
+
+class JSONItemPipelineTestCase(unittest.TestCase):
+    """Tests cases against the JSON item pipeline."""
+
+    PATH = "/latest/meta-data/network/interfaces/macs/0a:1b:2c:3d:4e:5f/vpc-id"
+
+    def create_route(self, response="vpc-0123456789abcdef0"):
+        """Create a route with a private path and response."""
+        return Route(path=self.PATH, headers={ "Server": "EC2ws" }, response=response, response_encoding="text")
+
+    def test_from_crawler(self):
+        """Tests that sanitize settings, including disabled limits, survive construction from a crawler."""
+        crawler = mock.Mock()
+        crawler.settings = Settings({
+            'JSON_OUTPUT_FILE': "metadata.json",
+            'SANITIZE_FALLBACK': SanitizeBudget.FALLBACK_SKIP,
+            'SANITIZE_MAX_SIZE': 0,
+            'SANITIZE_MAX_TIME': 0,
+        })
+
+        budget = JSONItemPipeline.from_crawler(crawler).sanitize_budget
+
+        self.assertEqual(0, budget.max_size)
+        self.assertEqual(0, budget.max_time)
+        self.assertEqual(SanitizeBudget.FALLBACK_SKIP, budget.fallback)
+
+        crawler.settings = Settings({ 'JSON_OUTPUT_FILE': "metadata.json" })
+
+        budget = JSONItemPipeline.from_crawler(crawler).sanitize_budget
+
+        self.assertEqual(SanitizeBudget.DEFAULT_MAX_SIZE, budget.max_size)
+        self.assertEqual(SanitizeBudget.DEFAULT_MAX_TIME, budget.max_time)
+        self.assertEqual(SanitizeBudget.FALLBACK_REDACT, budget.fallback)
+
+    def test_within_budget(self):
+        """Tests that routes within budget are sanitized and stored."""
+        pipeline = JSONItemPipeline("metadata.json", sanitize_budget=SanitizeBudget())
+        pipeline.process_item(self.create_route(), None)
+
+        route = pipeline.result["routes"]["/latest/meta-data/network/interfaces/macs/01:23:45:67:89:ab/vpc-id"]
+
+        self.assertEqual("vpc-0123456789abcdef0", route["response"])
+
+    def test_fallback_redact(self):
+        """Tests that routes over budget are stored with a sanitized path and an empty response."""
+        pipeline = JSONItemPipeline("metadata.json",
+            sanitize_budget=SanitizeBudget(max_size=10, fallback=SanitizeBudget.FALLBACK_REDACT))
+        pipeline.process_item(self.create_route(), None)
+
+        routes = pipeline.result["routes"]
+
+        self.assertEqual(["/latest/meta-data/network/interfaces/macs/01:23:45:67:89:ab/vpc-id"], list(routes.keys()))
+        self.assertEqual("", routes["/latest/meta-data/network/interfaces/macs/01:23:45:67:89:ab/vpc-id"]["response"])
+
+    def test_fallback_skip(self):
+        """Tests that routes over budget are dropped."""
+        pipeline = JSONItemPipeline("metadata.json",
+            sanitize_budget=SanitizeBudget(max_size=10, fallback=SanitizeBudget.FALLBACK_SKIP))
+        pipeline.process_item(self.create_route(), None)
+
+        self.assertEqual({}, pipeline.result["routes"])
+
+    def test_flat_output(self):
+        """Tests that the flat layout writes the same file as a flat map keyed by each item's path."""
+        paths = ["/", "/latest", "/latest/meta-data/", "/latest/meta-data/iam/", "/latest/meta-data/iam/info",
+            "/latest/meta-data/iam-x", "/latest/meta-data/local-ipv4", "/latest/meta-data/public-keys/",
+            "/latest/meta-data/public-keys/0/", "/latest/meta-data/public-keys/0/openssh-key", "/latest/user-data",
+            "/2009-04-04", "/2009-04-04/meta-data/", "/2009-04-04/meta-data/local-ipv4"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            pipeline = JSONItemPipeline(os.path.join(directory, "metadata.json"))
+            expected = {}
+
+            for path in paths:
+                item = Route(path=path, headers={ "Server": "EC2ws" }, response="172.31.0.12", response_encoding="text")
+                pipeline.process_item(item, None)
+
+                expected[item["path"]] = {
+                    'path': item["path"],
+                    'headers': item["headers"],
+                    'response': item["response"],
+                    'response_encoding': item["response_encoding"],
+                }
+
+            pipeline.close_spider(None)
+
+            with open(pipeline.output_file) as f:
+                self.assertEqual(json.dumps({ "routes": expected }, sort_keys=True, indent=2), f.read())
+
+    def test_conflict(self):
+        """Tests that a route colliding with an existing route is dropped rather than overwriting it."""
+        pipeline = JSONItemPipeline("metadata.json")
+        pipeline.process_item(Route(path="/latest", headers={}, response="meta-data", response_encoding="text"), None)
+        pipeline.process_item(Route(path="/latest/", headers={}, response="other", response_encoding="text"), None)
+
+        self.assertEqual({ "/latest": {
+            'path': "/latest",
+            'headers': {},
+            'response': "meta-data",
+            'response_encoding': "text",
+        }}, pipeline.result["routes"])
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from metascrape.exceptions import RouteConflictException
+
+import json
+import sys
+
+
+class RouteNode(object):
+    """
+    A node in the route tree, representing a single path segment.
+
+    Segments are interned, so that the many repeated segments of a multi-version crawl, such as `meta-data`, share a
+    single string. Paths and postfixes are rebuilt from the parent chain rather than stored on each node.
+    """
+
+    __slots__ = ("segment", "parent", "children", "stored", "directory", "headers", "response", "response_encoding")
+
+    def __init__(self, segment="", parent=None):
+        """Construct a new node for the given segment beneath the given parent."""
+        self.segment, self.parent, self.children, self.stored = segment, parent, {}, False
+        self.directory, self.headers, self.response, self.response_encoding = False, None, None, None
+
+    @property
+    def depth(self):
+        """Return the number of segments between the root and this node."""
+        depth, node = 0, self
+
+        while node.parent is not None:
+            depth, node = depth + 1, node.parent
+
+        return depth
+
+    @property
+    def segments(self):
+        """Return the segments from the root to this node."""
+        segments, node = [], self
+
+        while node.parent is not None:
+            segments.append(node.segment)
+            node = node.parent
+
+        segments.reverse()
+
+        return segments
+
+    @property
+    def path(self):
+        """Return the full path of this node, with a trailing slash if it was crawled as a directory."""
+        segments = self.segments
+
+        if not segments:
+            return "/"
+
+        return "/{}{}".format("/".join(segments), "/" if self.directory else "")
+
+    @property
+    def postfix(self):
+        """Return the path postfix without the API version prepended."""
+        return "{}{}".format("/".join(self.segments[1:]), "/" if self.directory else "")
+
+    @property
+    def version(self):
+        """Return the API version this node belongs to, or None for the root."""
+        segments = self.segments
+
+        return segments[0] if segments else None
+
+    @property
+    def has_route(self):
+        """Return whether a route has been stored at this node."""
+        return self.stored
+
+    def record(self, path=None):
+        """Return the JSON record for the route stored at this node."""
+        return {
+            'path': path if path is not None else self.path,
+            'headers': self.headers,
+            'response': self.response,
+            'response_encoding': self.response_encoding,
+        }
+
+    def walk(self):
+        """Iterate over this node and every node beneath it, depth-first in segment order."""
+        yield self
+
+        for segment in sorted(self.children.keys()):
+            yield from self.children[segment].walk()
+
+    def routes(self):
+        """Iterate over every node in this subtree which has a route stored."""
+        return filter(lambda node: node.has_route, self.walk())
+
+
+class RouteTree(object):
+    """
+    An in-memory trie of crawled routes, keyed by path segment.
+
+    The first level of the tree contains the API versions of the metadata service, and each level below mirrors the
+    directory structure of the service. Routes are inserted as they arrive from the spider and can be serialized to
+    either a flat dictionary keyed by path or a nested dictionary of path segments, or streamed as JSON in either
+    layout without building that dictionary.
+    """
+
+    LAYOUT_FLAT = "flat"
+
+    LAYOUT_NESTED = "nested"
+
+    LAYOUTS = (LAYOUT_FLAT, LAYOUT_NESTED)
+
+    def __init__(self):
+        """Construct a new, empty route tree."""
+        self.root = RouteNode()
+
+    @staticmethod
+    def split(path):
+        """Split the given path into its interned segments."""
+        return [sys.intern(s) for s in path.split("/") if len(s) > 0]
+
+    def insert(self, path, headers, response, response_encoding):
+        """
+        Insert a route at the given path, creating any missing parent nodes, and return its node.
+
+        Raise `RouteConflictException` if the path would not be reproduced exactly by the tree, or if a route has
+        already been stored at its node.
+        """
+        segments = RouteTree.split(path)
+        directory = path.endswith("/") and len(segments) > 0
+
+        if path != "/{}{}".format("/".join(segments), "/" if directory else ""):
+            raise RouteConflictException("Route path {} is not canonical".format(path))
+
+        node = self.root
+
+        for segment in segments:
+            child = node.children.get(segment)
+
+            if child is None:
+                child = node.children[segment] = RouteNode(segment, node)
+
+            node = child
+
+        if node.has_route:
+            raise RouteConflictException("Route path {} conflicts with existing route {}".format(path, node.path))
+
+        node.stored, node.directory = True, directory
+        node.headers, node.response, node.response_encoding = headers, response, response_encoding
+
+        return node
+
+    def get(self, path):
+        """Return the node at the given path, or None if no such node exists."""
+        node = self.root
+
+        for segment in RouteTree.split(path):
+            node = node.children.get(segment)
+
+            if node is None:
+                return None
+
+        return node
+
+    def versions(self):
+        """Return the API versions present in the tree."""
+        return sorted(self.root.children.keys())
+
+    def project(self, version):
+        """Return a dictionary of path postfixes to nodes for every route of the given API version."""
+        result = {}
+        node = self.root.children.get(version)
+
+        if node is None:
+            return result
+
+        def visit(node, prefix):
+            if node.has_route:
+                result["{}{}".format(prefix, "/" if node.directory else "")] = node
+
+            for segment in sorted(node.children.keys()):
+                visit(node.children[segment], segment if not prefix else "{}/{}".format(prefix, segment))
+
+        visit(node, "")
+
+        return result
+
+    def iter_flat(self):
+        """Lazily iterate over the full path and node of every route in the tree, depth-first in segment order."""
+        def visit(node, prefix):
+            if node.has_route:
+                yield ("{}/".format(prefix) if node.directory else (prefix or "/")), node
+
+            for segment in sorted(node.children.keys()):
+                yield from visit(node.children[segment], "{}/{}".format(prefix, segment))
+
+        return visit(self.root, "")
+
+    def to_flat(self):
+        """Serialize the tree to a dictionary of full paths to route records."""
+        return { path: node.record(path) for path, node in self.iter_flat() }
+
+    def to_nested(self):
+        """
+        Serialize the tree to nested dictionaries of path segments.
+
+        Each node becomes a dictionary containing its `route` record, if one was crawled, and its `children` keyed by
+        segment, if it has any.
+        """
+        def visit(node, prefix):
+            path = "{}/".format(prefix) if node.directory else (prefix or "/")
+            result = {}
+
+            if node.has_route:
+                result['route'] = node.record(path)
+
+            if node.children:
+                result['children'] = { segment: visit(child, "{}/{}".format(prefix, segment))
+                    for segment, child in node.children.items() }
+
+            return result
+
+        return visit(self.root, "")
+
+    def serialize(self, layout=LAYOUT_FLAT):
+        """Serialize the tree in the given layout."""
+        if layout == RouteTree.LAYOUT_FLAT:
+            return self.to_flat()
+        elif layout == RouteTree.LAYOUT_NESTED:
+            return self.to_nested()
+        else:
+            raise ValueError("Unknown route tree layout: {}".format(layout))
+
+    def iterencode(self, layout=LAYOUT_FLAT, indent=2, level=0):
+        """
+        Encode the tree as JSON in the given layout, yielding it chunk by chunk.
+
+        Only one route record is encoded at a time, so the tree can be written out without holding a serialized copy
+        of it in memory. The output is identical to `json.dumps(self.serialize(layout), sort_keys=True)` with the given
+        indent, nested the given number of levels deep. Flat paths are sorted as full strings, holding only the paths
+        and node references in memory, so that output stays byte-identical to a flat dictionary dumped with sorted keys.
+        """
+        def encode_record(node, path, level):
+            # json escapes newlines within strings, so every newline in the output is indentation
+            yield json.dumps(node.record(path), sort_keys=True, indent=indent).replace("\n",
+                "\n" + " " * indent * level)
+
+        def encode_object(members, level):
+            inner, first = "\n" + " " * indent * (level + 1), True
+
+            yield "{"
+
+            for key, chunks in members:
+                yield "{}{}{}: ".format("" if first else ",", inner, json.dumps(key))
+                yield from chunks
+                first = False
+
+            yield "}" if first else "\n{}}}".format(" " * indent * level)
+
+        def encode_node(node, prefix, level):
+            path = "{}/".format(prefix) if node.directory else (prefix or "/")
+            members = []
+
+            # keys are emitted in sorted order, as with sort_keys
+            if node.children:
+                members.append(("children", encode_object(((segment, encode_node(node.children[segment],
+                    "{}/{}".format(prefix, segment), level + 2)) for segment in sorted(node.children.keys())),
+                    level + 1)))
+
+            if node.has_route:
+                members.append(("route", encode_record(node, path, level + 1)))
+
+            return encode_object(members, level)
+
+        if layout == RouteTree.LAYOUT_FLAT:
+            routes = sorted(self.iter_flat(), key=lambda route: route[0])
+
+            return encode_object(((path, encode_record(node, path, level + 1)) for path, node in routes), level)
+        elif layout == RouteTree.LAYOUT_NESTED:
+            return encode_node(self.root, "", level)
+        else:
+            raise ValueError("Unknown route tree layout: {}".format(layout))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from metascrape.exceptions import RouteConflictException
+from metascrape.routes import RouteTree
+
+import json
+import unittest
+
+
+class RouteTreeTestCase(unittest.TestCase):
+    """Tests cases against the route tree."""
+
+    PATHS = ["/", "/latest", "/latest/meta-data/", "/latest/meta-data/local-hostname",
+        "/latest/meta-data/public-keys/", "/latest/meta-data/public-keys/0/", "/latest/user-data",
+        "/2009-04-04", "/2009-04-04/meta-data/", "/2009-04-04/meta-data/local-hostname"]
+
+    def setUp(self):
+        """Construct a route tree with routes across two API versions."""
+        self.tree = RouteTree()
+
+        for path in self.PATHS:
+            self.tree.insert(path, { "Server": "EC2ws" }, "response for {}".format(path), "text")
+
+    def test_get(self):
+        """Tests looking up nodes by path."""
+        node = self.tree.get("/latest/meta-data/local-hostname")
+
+        self.assertEqual("local-hostname", node.segment)
+        self.assertEqual(3, node.depth)
+        self.assertEqual("response for /latest/meta-data/local-hostname", node.response)
+
+        self.assertIs(self.tree.root, self.tree.get("/"))
+        self.assertIsNone(self.tree.get("/latest/meta-data/nope"))
+
+    def test_interned_segments(self):
+        """Tests that identical segments in different versions share a single string."""
+        latest = self.tree.get("/latest/meta-data/local-hostname")
+        legacy = self.tree.get("/2009-04-04/meta-data/local-hostname")
+
+        self.assertIsNot(latest, legacy)
+        self.assertIs(latest.segment, legacy.segment)
+        self.assertIs(latest.parent.segment, legacy.parent.segment)
+
+    def test_projections(self):
+        """Tests path, postfix, and version projection of nodes."""
+        for path in self.PATHS:
+            self.assertEqual(path, self.tree.get(path).path)
+
+        node = self.tree.get("/latest/meta-data/public-keys/0/")
+
+        self.assertEqual("meta-data/public-keys/0/", node.postfix)
+        self.assertEqual("latest", node.version)
+        self.assertIsNone(self.tree.root.version)
+
+        self.assertEqual(["2009-04-04", "latest"], self.tree.versions())
+        self.assertEqual(["", "meta-data/", "meta-data/local-hostname"], sorted(self.tree.project("2009-04-04")))
+        self.assertEqual({}, self.tree.project("1.0"))
+
+    def test_subtree(self):
+        """Tests iterating over the routes beneath a node."""
+        node = self.tree.get("/latest/meta-data/")
+
+        self.assertEqual(["/latest/meta-data/", "/latest/meta-data/local-hostname", "/latest/meta-data/public-keys/",
+            "/latest/meta-data/public-keys/0/"], [n.path for n in node.routes()])
+
+    def test_flat(self):
+        """Tests serializing to a flat dictionary keyed by path."""
+        result = self.tree.serialize(RouteTree.LAYOUT_FLAT)
+
+        self.assertEqual(sorted(self.PATHS), sorted(result.keys()))
+
+        for path in self.PATHS:
+            self.assertEqual({
+                'path': path,
+                'headers': { "Server": "EC2ws" },
+                'response': "response for {}".format(path),
+                'response_encoding': "text",
+            }, result[path])
+
+    def test_nested(self):
+        """Tests serializing to nested dictionaries of path segments."""
+        result = self.tree.serialize(RouteTree.LAYOUT_NESTED)
+
+        self.assertEqual("/", result['route']['path'])
+        self.assertEqual(["2009-04-04", "latest"], sorted(result['children'].keys()))
+
+        meta_data = result['children']['latest']['children']['meta-data']
+
+        self.assertEqual("/latest/meta-data/", meta_data['route']['path'])
+        self.assertEqual("response for /latest/meta-data/local-hostname",
+            meta_data['children']['local-hostname']['route']['response'])
+        self.assertNotIn('children', meta_data['children']['local-hostname'])
+
+        with self.assertRaises(ValueError):
+            self.tree.serialize("tree")
+
+    def test_conflicts(self):
+        """Tests that routes which would collide with or not reproduce their own path are rejected."""
+        for path in ["/latest/", "/latest/meta-data", "/latest//meta-data/local-hostname",
+                "/latest/meta-data/local-hostname"]:
+            with self.assertRaises(RouteConflictException):
+                self.tree.insert(path, {}, "conflict", "text")
+
+        self.assertEqual("/latest", self.tree.get("/latest").path)
+        self.assertEqual("response for /latest/meta-data/", self.tree.get("/latest/meta-data/").response)
+
+    def test_empty_response(self):
+        """Tests that routes without a response are still stored and still conflict."""
+        self.tree.insert("/latest/meta-data/empty", {}, None, "text")
+
+        self.assertIn("/latest/meta-data/empty", self.tree.to_flat())
+
+        with self.assertRaises(RouteConflictException):
+            self.tree.insert("/latest/meta-data/empty", {}, "overwrite", "text")
+
+    def test_iterencode(self):
+        """Tests that streamed JSON matches the serialized tree in both layouts."""
+        self.tree.insert("/latest/meta-data/iam/info", {}, "multi\nline \"quoted\" response", "text")
+
+        for layout in RouteTree.LAYOUTS:
+            encoded = "".join(self.tree.iterencode(layout))
+
+            self.assertEqual(self.tree.serialize(layout), json.loads(encoded))
+
+        self.tree.insert("/latest/meta-data/iam-x", {}, "sorts before iam/", "text")
+
+        for layout in RouteTree.LAYOUTS:
+            self.assertEqual(json.dumps(self.tree.serialize(layout), sort_keys=True, indent=2),
+                "".join(self.tree.iterencode(layout)))
+        self.assertEqual(json.dumps({ "routes": self.tree.to_nested() }, sort_keys=True, indent=2),
+            '{\n  "routes": ' + "".join(self.tree.iterencode(RouteTree.LAYOUT_NESTED, level=1)) + '\n}')
+        self.assertEqual("{}", "".join(RouteTree().iterencode()))